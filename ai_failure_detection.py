@@ -3,13 +3,27 @@ import json
 import time
 import os
 from openai._exceptions import RateLimitError
+from local_failure_analysis import LocalFailureAnalyzer, format_insights
+from prompt_builder import build_failure_prompt, estimate_file_tokens
 
 
 # Use environment variable for safety
 openai.api_key = os.getenv("OPENAI_API_KEY")
+# "llm" queries GPT-4 after the local analysis, "local" skips the network call entirely
+ANALYSIS_BACKENDS = ("llm", "local")
+ANALYSIS_BACKEND = os.getenv("FAILURE_ANALYSIS_BACKEND", "llm")
 
 class AIFailureDetection:
-    def __init__(self, failure_logs_path, network_logs_path=None, environment_logs_path=None):
+    def __init__(self, failure_logs_path, network_logs_path=None, environment_logs_path=None, backend=None,
+                 token_budget=None):
+        self.backend = backend or ANALYSIS_BACKEND
+        if self.backend not in ANALYSIS_BACKENDS:
+            raise ValueError(f"Unknown failure analysis backend '{self.backend}'; expected one of {ANALYSIS_BACKENDS}.")
+        self.token_budget = token_budget
+        self.insights = None
+        self.prompt_stats = None
+        self.log_paths = (failure_logs_path, network_logs_path, environment_logs_path)
+
         with open(failure_logs_path, "r") as f:
             self.failure_logs = json.load(f)
 
@@ -24,22 +38,25 @@ class AIFailureDetection:
             with open(environment_logs_path, "r") as f:
                 self.environment_logs = json.load(f)
 
+    def analyze_structured(self):
+        """Compute structured failure insights locally from the loaded logs."""
+        if self.insights is None:
+            self.insights = LocalFailureAnalyzer(self.failure_logs, self.network_logs, self.environment_logs).analyze()
+        return self.insights
+
     def analyze_failures(self, max_retries=5):
-        # Limit the size of the logs sent to GPT
-        failure_data = self.failure_logs[-10:] if len(self.failure_logs) > 10 else self.failure_logs
+        if self.backend == "local":
+            return format_insights(self.analyze_structured())
 
-        prompt = (
-            "You are an AI analyzing server failures. Below are the failure logs, network conditions, and environmental conditions:\n\n"
-            f"Failure Logs:\n{json.dumps(failure_data, indent=2)}\n\n"
-            f"Network Conditions:\n{json.dumps(self.network_logs, indent=2)}\n\n"
-            f"Environmental Conditions:\n{json.dumps(self.environment_logs, indent=2)}\n\n"
-            "Analyze the failures and provide actionable insights. Consider:\n"
-            "1. Which servers are failing most frequently?\n"
-            "2. Any patterns (time, network, environment)?\n"
-            "3. Recommendations to reduce failures.\n"
-            "4. Correlations across logs?\n"
-            "Structure your answer with clear observations and action points."
-        )
+        # Send a bounded summary of the logs instead of the raw JSON
+        try:
+            prompt, self.prompt_stats = build_failure_prompt(self.analyze_structured(),
+                                                             estimate_file_tokens(*self.log_paths), self.token_budget)
+        except ValueError as e:
+            print(f"Error building the failure prompt: {str(e)} Falling back to the local analysis.")
+            return format_insights(self.analyze_structured())
+        print(f"Prompt: {self.prompt_stats['prompt_tokens']} tokens (budget {self.prompt_stats['token_budget']}), "
+              f"compression ratio {self.prompt_stats['compression_ratio']}x")
 
         for attempt in range(max_retries):
             try:
@@ -58,9 +75,11 @@ class AIFailureDetection:
                 time.sleep(wait_time)
 
             except Exception as e:
-                return f"Error analyzing failures: {str(e)}"
+                print(f"Error analyzing failures: {str(e)}. Falling back to the local analysis.")
+                return format_insights(self.analyze_structured())
 
-        return "Error: Maximum retry attempts reached due to rate limiting."
+        print("Error: Maximum retry attempts reached due to rate limiting. Falling back to the local analysis.")
+        return format_insights(self.analyze_structured())
 
 if __name__ == "__main__":
     ai_detector = AIFailureDetection(
@@ -0,0 +1,214 @@
+import time
+import numpy as np
+from local_failure_analysis import time_series
+
+try:
+    from scipy.signal import lfilter
+except ImportError:  # scipy is optional; long streams then go through the round-by-round update
+    lfilter = None
+
+METRICS = ("latency", "packet_loss", "temperature", "cooling_efficiency")
+NETWORK_METRICS = ("latency", "packet_loss")
+ENVIRONMENT_METRICS = ("temperature", "cooling_efficiency")
+# Shift direction that signals degradation for each metric
+ADVERSE_DIRECTIONS = {"latency": "up", "packet_loss": "up", "temperature": "up", "cooling_efficiency": "down"}
+FLEET_STREAM = "fleet"  # Stream id for facility-wide readings that are not tied to one server
+# Smallest standard deviation a deviation is measured against: 1% of the mean, and at least
+# 1 ms latency / 0.1 for the others, so a flat series does not turn tiny wobbles into huge z-scores
+RELATIVE_STD_FLOOR = 0.01
+MIN_STD = np.array([1.0, 0.1, 0.1, 0.1])
+# A single-stream sequential pass costs about as much as this many rounds of the batched update
+SEQUENTIAL_PASS_ROUNDS = 3
+
+
+class StreamingAnomalyDetector:
+    """Online EWMA mean/variance and two-sided CUSUM per stream and metric.
+
+    All state lives in (streams x metrics) arrays, so each event costs O(1) and a batch
+    of events is applied with a handful of vectorized numpy operations. Deviations are
+    standardized against the EWMA statistics before the update; CUSUM accumulates them
+    so sustained shifts (HVAC drift, creeping latency) stand out from one-off spikes.
+
+    Batches spread over many streams are applied in rounds of one event per stream. Long
+    runs of events on a single stream are filtered in one pass per stream instead (needs
+    scipy), so a handful of busy streams does not cost one round per event.
+    """
+
+    def __init__(self, stream_ids, alpha=0.2, warmup=3, cusum_slack=0.5, cusum_threshold=4.0, z_threshold=3.0):
+        self.stream_ids = list(stream_ids)
+        self.rows = {stream_id: i for i, stream_id in enumerate(self.stream_ids)}
+        self.alpha = alpha
+        self.warmup = warmup
+        self.cusum_slack = cusum_slack
+        self.cusum_threshold = cusum_threshold
+        self.z_threshold = z_threshold
+
+        # One (streams x 6 x metrics) block so a batch gathers and scatters its rows once;
+        # count, mean, var, z, cusum_high and cusum_low are views into it
+        self.state = np.zeros((len(self.stream_ids), 6, len(METRICS)))
+        self.count, self.mean, self.var, self.z, self.cusum_high, self.cusum_low = (
+            self.state[:, i] for i in range(6)
+        )
+
+    def update(self, rows, values):
+        """Apply a batch of events; rows are stream indexes, values is (events x metrics), NaN = missing."""
+        rows = np.asarray(rows, dtype=np.int64)
+        values = np.asarray(values, dtype=float).reshape(len(rows), len(METRICS))
+        if not len(rows):
+            return
+
+        # Events of the same stream must apply in order: split the batch into rounds of unique rows
+        order = np.argsort(rows, kind="stable")
+        sorted_rows = rows[order]
+        first = np.r_[True, sorted_rows[1:] != sorted_rows[:-1]]
+        rank = np.arange(len(rows)) - np.maximum.accumulate(np.where(first, np.arange(len(rows)), 0))
+        if not rank.any():
+            self._apply(rows, values)
+            return
+
+        if lfilter is not None:
+            # Take the k busiest streams out of the rounds, with k minimizing passes + remaining rounds
+            starts = np.flatnonzero(first)
+            lengths = np.diff(np.r_[starts, len(rows)])
+            busiest = np.argsort(-lengths, kind="stable")
+            cost = SEQUENTIAL_PASS_ROUNDS * np.arange(len(lengths) + 1) + np.r_[lengths[busiest], 0]
+            long_runs = np.zeros(len(lengths), dtype=bool)
+            long_runs[busiest[:int(np.argmin(cost))]] = True
+            for start, length in zip(starts[long_runs], lengths[long_runs]):
+                events = order[start:start + length]
+                self._apply_sequence(sorted_rows[start], values[events])
+            if long_runs.any():
+                keep = np.repeat(~long_runs, lengths)
+                order, rank = order[keep], rank[keep]
+                if not len(order):
+                    return
+
+        by_round = order[np.argsort(rank, kind="stable")]
+        for events in np.split(by_round, np.cumsum(np.bincount(rank))[:-1]):
+            self._apply(rows[events], values[events])
+
+    @staticmethod
+    def _std(mean, var, metrics=slice(None)):
+        """EWMA standard deviation, floored relative to the mean and per metric."""
+        floor = np.maximum(RELATIVE_STD_FLOOR * np.abs(mean), MIN_STD[metrics])
+        return np.sqrt(np.maximum(var, floor ** 2))
+
+    def _apply(self, rows, values):
+        """Vectorized update for events that each touch a different stream."""
+        valid = ~np.isnan(values)
+        state = self.state[rows]
+        count, mean, var, last_z, cusum_high, cusum_low = state.transpose(1, 0, 2)
+
+        diff = np.where(valid, values - mean, 0.0)
+        z = np.where(valid & (count >= self.warmup), diff / self._std(mean, var), 0.0)
+        starting = valid & (count == 0)
+
+        var[:] = np.where(valid & ~starting, (1 - self.alpha) * (var + self.alpha * diff ** 2), var)
+        mean[:] = np.where(starting, np.nan_to_num(values), mean + self.alpha * diff)
+        last_z[:] = np.where(valid, z, last_z)
+        cusum_high[:] = np.where(valid, np.maximum(0.0, cusum_high + z - self.cusum_slack), cusum_high)
+        cusum_low[:] = np.where(valid, np.maximum(0.0, cusum_low - z - self.cusum_slack), cusum_low)
+        count += valid
+        self.state[rows] = state
+
+    def _apply_sequence(self, row, values):
+        """Apply many ordered events of one stream at once, metric by metric.
+
+        The EWMA mean and variance are first-order linear recursions, so lfilter runs them
+        in one pass; CUSUM is a Lindley recursion, S_t = max(S_0 + C_t, C_t - min C_j) over
+        the running sums C of (z - slack).
+        """
+        decay = 1 - self.alpha
+        for j in range(len(METRICS)):
+            x = values[:, j]
+            x = x[~np.isnan(x)]
+            if not len(x):
+                continue
+            count, mean, var = self.count[row, j], self.mean[row, j], self.var[row, j]
+            z = np.zeros(len(x))
+            rest = x
+            if count == 0:
+                mean, rest = x[0], x[1:]
+            if len(rest):
+                means = lfilter([self.alpha], [1, -decay], rest, zi=[decay * mean])[0]
+                previous_mean = np.r_[mean, means[:-1]]
+                diff = rest - previous_mean
+                variances = lfilter([1], [1, -decay], decay * self.alpha * diff ** 2, zi=[decay * var])[0]
+                previous_var = np.r_[var, variances[:-1]]
+                seen = count + (count == 0) + np.arange(len(rest))
+                z[len(x) - len(rest):] = np.where(seen >= self.warmup,
+                                                  diff / self._std(previous_mean, previous_var, j), 0.0)
+                mean, var = means[-1], variances[-1]
+
+            self.mean[row, j], self.var[row, j], self.z[row, j] = mean, var, z[-1]
+            self.count[row, j] = count + len(x)
+            for cusum, steps in ((self.cusum_high, z - self.cusum_slack), (self.cusum_low, -z - self.cusum_slack)):
+                running = np.cumsum(steps)
+                cusum[row, j] = max(cusum[row, j] + running[-1], running[-1] - min(0.0, running.min()))
+
+    def is_warm(self, stream_id):
+        """True once any metric of the stream has seen enough events to be scored."""
+        return bool(self.count[self.rows[stream_id]].max() >= self.warmup)
+
+    def replay(self, rows, values, batch_size=262144):
+        """Feed a recorded event stream through the detector in batches; returns events per second."""
+        rows = np.asarray(rows, dtype=np.int64)
+        values = np.asarray(values, dtype=float).reshape(len(rows), len(METRICS))
+        start = time.perf_counter()
+        for offset in range(0, len(rows), batch_size):
+            self.update(rows[offset:offset + batch_size], values[offset:offset + batch_size])
+        elapsed = time.perf_counter() - start
+        return len(rows) / elapsed if elapsed > 0 else float("inf")
+
+    def scores(self, stream_id):
+        """Anomaly summary for one stream: combined z-score, CUSUM change score and shifted metrics.
+
+        ``degrading`` is True only when a metric has shifted in its adverse direction.
+        """
+        i = self.rows[stream_id]
+        anomaly = np.sqrt(np.mean(self.z[i] ** 2))
+        change = max(self.cusum_high[i].max(), self.cusum_low[i].max()) / self.cusum_threshold
+        shifted = {}
+        for j, metric in enumerate(METRICS):
+            if self.cusum_high[i, j] >= self.cusum_threshold:
+                shifted[metric] = "up"
+            elif self.cusum_low[i, j] >= self.cusum_threshold:
+                shifted[metric] = "down"
+        return {
+            "anomaly_score": round(float(anomaly), 3),
+            "change_score": round(float(change), 3),
+            "anomalous": bool(anomaly >= self.z_threshold or change >= 1),
+            "shifted_metrics": shifted,
+            "degrading": any(ADVERSE_DIRECTIONS[metric] == direction for metric, direction in shifted.items()),
+        }
+
+
+def detector_from_logs(network_logs, environment_logs, **kwargs):
+    """Replay the generated network and environment logs through a new detector.
+
+    Logs with a ``time_steps`` series are facility-wide and feed the ``fleet`` stream,
+    aligned by position; logs keyed by server id contribute one event per server.
+    """
+    network_steps = time_series(network_logs)
+    environment_steps = time_series(environment_logs)
+    per_server = {}
+    for logs in (network_logs, environment_logs):
+        for server_id, record in logs.items():
+            if server_id != "time_steps" and isinstance(record, dict):
+                per_server.setdefault(server_id, {}).update(record)
+
+    detector = StreamingAnomalyDetector([FLEET_STREAM, *sorted(per_server)], **kwargs)
+    records = [
+        {**(network_steps[t] if t < len(network_steps) else {}),
+         **(environment_steps[t] if t < len(environment_steps) else {})}
+        for t in range(max(len(network_steps), len(environment_steps)))
+    ]
+    rows = [detector.rows[FLEET_STREAM]] * len(records)
+    for server_id, record in per_server.items():
+        rows.append(detector.rows[server_id])
+        records.append(record)
+
+    values = [[record[metric] if isinstance(record.get(metric), (int, float)) else np.nan for metric in METRICS]
+              for record in records]
+    detector.update(rows, np.array(values, dtype=float).reshape(len(rows), len(METRICS)))
+    return detector
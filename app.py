@@ -3,9 +3,11 @@ import subprocess
 import os
 import json
 import pandas as pd
+import numpy as np
 import altair as alt
 import sys
 import matplotlib.pyplot as plt
+from fleet_registry import FleetRegistry, INDEXED_FIELDS
 
 # Define file paths
 data_folder = 'data'
@@ -85,9 +87,44 @@ def run_visual_chart():
     except Exception as e:
         st.error(f"❌ Error loading or visualizing data: {e}")
 
+def run_fleet_drilldown():
+    st.subheader("🔎 Filter Servers by Cost, Reliability and Latency")
+
+    demand_path = os.path.join(data_folder, "dynamic_demand.json")
+    if not os.path.exists(demand_path):
+        st.error("❌ dynamic_demand.json file not found.")
+        return
+
+    with open(demand_path, "r") as f:
+        registry = FleetRegistry(json.load(f).get("servers", {}))
+
+    if not registry:
+        st.warning("⚠️ No server configurations found in dynamic_demand.json.")
+        return
+
+    ranges = {}
+    for field in INDEXED_FIELDS:
+        values = registry.column(field)
+        missing = int(np.isnan(values).sum())
+        if missing == len(values):
+            st.caption(f"No server has a {field} value; {field} filter skipped.")
+            continue
+        low, high = float(np.nanmin(values)), float(np.nanmax(values))
+        if low < high:
+            label = f"{field.capitalize()} range" + (f" ({missing} servers without a value)" if missing else "")
+            selected = st.slider(label, low, high, (low, high))
+            # Servers missing the field only drop out once the range is actually narrowed
+            if selected != (low, high):
+                ranges[field] = selected
+
+    matches = registry.query(inclusive=True, **ranges)
+    st.write(f"**{len(matches)} of {len(registry)} servers match**")
+    if matches:
+        st.dataframe(pd.DataFrame([registry[server_id].to_dict() for server_id in matches]))
+
 # Sidebar Navigation
 st.sidebar.title("🧠 Server Fleet Optimization")
-page = st.sidebar.radio("Navigate", ["Dynamic Data", "Historical Data", "Run Scripts", "Visual Charts"])
+page = st.sidebar.radio("Navigate", ["Dynamic Data", "Historical Data", "Run Scripts", "Visual Charts", "Fleet Drill-down"])
 
 # Pages
 if page == "Dynamic Data":
@@ -116,4 +153,8 @@ elif page == "Optimal-AIQ":
 elif page == "Visual Charts":
     st.title("📈 Server Action Trends")
     run_visual_chart()
+
+elif page == "Fleet Drill-down":
+    st.title("🔎 Fleet Drill-down")
+    run_fleet_drilldown()
     
@@ -5,6 +5,8 @@ from collections import Counter
 
 HISTORY_FILE = "output/historical_results.json"
 ALL_SERVERS = {"s1", "s2", "s3", "s4", "s5", "s6", "s7", "s8", "s9", "s10"}
+# Analyzer conditions reported as network issues; the rest (temperature, cooling, power) are environmental
+NETWORK_CONDITIONS = ("high_latency", "high_packet_loss")
 
 def extract_servers_from_text(text, patterns):
     """Extracts server identifiers from AI-generated failure analysis."""
@@ -15,6 +17,32 @@ def extract_servers_from_text(text, patterns):
             found_servers.update(re.findall(r"s\d+", match))  # Extract "s1", "s2", etc.
     return found_servers
 
+def extract_failed_servers(ai_analysis):
+    """Infers failed servers from free-text AI analysis (entries without structured insights)."""
+    operational_patterns = [
+        r'servers? ([s\d,\s]+) are operating fine',
+        r'servers? ([s\d,\s]+) are up and running',
+        r'servers? ([s\d,\s]+) are functional',
+        r'servers? ([s\d,\s]+) are online'
+    ]
+    failure_patterns = [
+        r'the failed servers are: ([s\d,\s]+)',
+        r'servers? ([s\d,\s]+) (?:have|has) failed',
+        r'servers? ([s\d,\s]+) are down',
+        r'servers? ([s\d,\s]+) experienced issues',
+        r'servers? ([s\d,\s]+) are not operational',
+        r'servers? ([s\d,\s]+) (?:encountered|had) failures?',
+        r'servers? ([s\d,\s]+) (?:became|were) non-functional'
+    ]
+
+    operational_servers = extract_servers_from_text(ai_analysis, operational_patterns)
+    failed_servers = extract_servers_from_text(ai_analysis, failure_patterns)
+
+    # Infer failures if operational servers are listed but failures are not
+    if operational_servers and not failed_servers:
+        failed_servers = ALL_SERVERS - operational_servers
+    return failed_servers
+
 def analyze_failure_trends():
     """Analyzes historical failure trends from AI-generated failure logs."""
     if not os.path.exists(HISTORY_FILE):
@@ -43,34 +71,22 @@ def analyze_failure_trends():
         for server, action in actions.items():
             action_counts[(server, action)] += 1
 
-        # Track failures from AI analysis
-        ai_analysis = entry.get("ai_failure_analysis", "")
-        operational_patterns = [
-            r'servers? ([s\d,\s]+) are operating fine',
-            r'servers? ([s\d,\s]+) are up and running',
-            r'servers? ([s\d,\s]+) are functional',
-            r'servers? ([s\d,\s]+) are online'
-        ]
-        failure_patterns = [
-            r'the failed servers are: ([s\d,\s]+)',
-            r'servers? ([s\d,\s]+) (?:have|has) failed',
-            r'servers? ([s\d,\s]+) are down',
-            r'servers? ([s\d,\s]+) experienced issues',
-            r'servers? ([s\d,\s]+) are not operational',
-            r'servers? ([s\d,\s]+) (?:encountered|had) failures?',
-            r'servers? ([s\d,\s]+) (?:became|were) non-functional'
-        ]
-
-        operational_servers = extract_servers_from_text(ai_analysis, operational_patterns)
-        failed_servers = extract_servers_from_text(ai_analysis, failure_patterns)
-
-        # Infer failures if operational servers are listed but failures are not
-        if operational_servers and not failed_servers:
-            failed_servers = ALL_SERVERS - operational_servers
-
-        # Count failure occurrences
-        for server in failed_servers:
-            failure_counts[server] += 1
+        # Prefer the structured insights from the local analyzer; fall back to mining the AI text
+        insights = entry.get("failure_insights")
+        if isinstance(insights, dict):
+            # Structured entries carry per-server failure counts over the logged time steps
+            for server in insights.get("failed_servers", []):
+                failure_counts[server] += insights.get("servers", {}).get(server, {}).get("failures", 1)
+            for condition, stats in insights.get("co_occurrence", {}).items():
+                lift = stats.get("lift")
+                if lift is not None and lift > 1:
+                    issue = f"{entry.get('timestamp')} ({condition}, failure lift {lift})"
+                    issues = network_issues if condition in NETWORK_CONDITIONS else environmental_issues
+                    issues.append(issue)
+        else:
+            # Count failure occurrences
+            for server in extract_failed_servers(entry.get("ai_failure_analysis", "")):
+                failure_counts[server] += 1
 
     # Track network and environmental issues
     network_impact = entry.get("network_impact", "")
@@ -91,7 +107,7 @@ def analyze_failure_trends():
 
     for server, impact in environmental_impact.items():
         if isinstance(impact, dict) and impact.get("Temperature", "").lower() == "high":
-            environmental_issues.append((server, entry.get("timestamp")))
+            environmental_issues.append(f"Server {server} had high temperature on {entry.get('timestamp')}")
 
     # Display Results
     print("\n" + "=" * 40)
@@ -119,8 +135,8 @@ def analyze_failure_trends():
     # Environmental Issues
     if environmental_issues:
         print("\n🌡️ Environmental Issues Detected:")
-        for server, timestamp in environmental_issues:
-            print(f"   - Server {server} had high temperature on {timestamp}")
+        for issue in environmental_issues:
+            print(f"   - {issue}")
     else:
         print("\n🌡️ No significant environmental issues detected.")
 
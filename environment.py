@@ -1,6 +1,8 @@
 import json
 import os
 import random
+from fleet_registry import FleetRegistry
+from anomaly_detection import ADVERSE_DIRECTIONS, ENVIRONMENT_METRICS, FLEET_STREAM, NETWORK_METRICS, detector_from_logs
 
 class Environment:
     def __init__(self, demand_path="data/dynamic_demand.json", network_path="data/dynamic_network_logs.json",
@@ -10,7 +12,8 @@ class Environment:
         self.environment_conditions = {}
         self.network_conditions = {}
         self.server_demand = {}
-        self.servers = {}  # ✅ Fix: Define servers
+        self.servers = FleetRegistry()  # Indexed server configurations
+        self.anomaly_detector = None  # Built lazily from the network/environment logs
 
         # Load each dataset if the file exists
         self.load_demand(demand_path)
@@ -24,7 +27,7 @@ class Environment:
             with open(path, "r") as file:
                 data = json.load(file)
                 self.server_demand = data.get("server_demand", {})
-                self.servers = data.get("servers", {})  # ✅ Fix: Store server info
+                self.servers = FleetRegistry(data.get("servers", {}))
         else:
             print(f"⚠️ Warning: Demand file '{path}' not found. Using defaults.")
 
@@ -52,11 +55,13 @@ class Environment:
         else:
             print(f"⚠️ Warning: Failure file '{path}' not found. Using defaults.")
 
-    def get_environment_factor(self, server_id):
-        """Retrieve environmental factors with slight variations."""
+    def get_environment_factor(self, server_id, noise=True):
+        """Retrieve environmental factors with slight variations (noise=False returns the logged values)."""
         env_data = self.environment_conditions.get(server_id, {
             "temperature": 50, "humidity": 50, "power_stability": "stable", "cooling_efficiency": 80
         })
+        if not noise:
+            return dict(env_data)
        
         # Introduce slight variations for unpredictability
         env_data["temperature"] += random.uniform(-5, 5)  
@@ -70,20 +75,45 @@ class Environment:
             "latency": 100, "packet_loss": 5, "network_outages": 0
         })
 
-    def get_failure_rate(self, server_id):
-        """Retrieve failure rate based on historical failures with random variability."""
+    def get_failure_rate(self, server_id, noise=True):
+        """Retrieve failure rate based on historical failures with random variability (unless noise=False)."""
         failure_history = self.failure_history.get(server_id, [])
         if not failure_history:
-            return round(random.uniform(0.01, 0.05), 2)  # Introduce randomness in default failure rate
+            return round(random.uniform(0.01, 0.05), 2) if noise else 0.03  # Introduce randomness in default failure rate
 
         recent_failures = sum(failure_history[-10:]) / max(len(failure_history[-10:]), 1)
-        variability = random.uniform(-0.02, 0.02)  # Add slight randomness
+        variability = random.uniform(-0.02, 0.02) if noise else 0  # Add slight randomness
         return round(min(0.4, recent_failures + 0.05 + variability), 2)
 
     def get_demand_factor(self, server_id):
         """Retrieve server demand."""
         return self.server_demand.get(server_id, 100)  # Default moderate demand
 
+    def get_anomaly_detector(self):
+        """Streaming anomaly detector over the loaded telemetry, replayed on first use."""
+        if self.anomaly_detector is None:
+            self.anomaly_detector = detector_from_logs(self.network_conditions, self.environment_conditions)
+        return self.anomaly_detector
+
+    def get_anomaly_scores(self, server_id):
+        """Retrieve trend anomaly scores, falling back to the facility-wide stream until the server's is warm."""
+        detector = self.get_anomaly_detector()
+        warm = server_id in detector.rows and detector.is_warm(server_id)
+        return detector.scores(server_id if warm else FLEET_STREAM)
+
+    def _trend_issues(self, metrics):
+        """Describe sustained adverse CUSUM shifts in the given metrics, per stream."""
+        detector = self.get_anomaly_detector()
+        trends = {}
+        for stream_id in detector.stream_ids:
+            shifted = detector.scores(stream_id)["shifted_metrics"]
+            issues = [f"📈 Sustained {metric.replace('_', ' ')} shift {direction} detected over recent readings."
+                      for metric, direction in shifted.items()
+                      if metric in metrics and ADVERSE_DIRECTIONS[metric] == direction]
+            if issues:
+                trends[stream_id] = issues
+        return trends
+
     def analyze_network_impact(self):
         """Analyze network conditions and return insights as a dictionary."""
         network_issues = {}
@@ -104,6 +134,9 @@ class Environment:
             if issues:
                 network_issues[server_id] = issues  # Store issues per server
 
+        for server_id, issues in self._trend_issues(NETWORK_METRICS).items():
+            network_issues.setdefault(server_id, []).extend(issues)
+
         return network_issues if network_issues else {"summary": "✅ Network conditions are stable."}
 
     def analyze_environmental_impact(self):
@@ -126,4 +159,7 @@ class Environment:
             if issues:
                 environmental_issues[server_id] = issues  # Store issues per server
 
+        for server_id, issues in self._trend_issues(ENVIRONMENT_METRICS).items():
+            environmental_issues.setdefault(server_id, []).extend(issues)
+
         return environmental_issues if environmental_issues else {"summary": "✅ Environmental conditions are stable."}
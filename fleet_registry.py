@@ -0,0 +1,135 @@
+from array import array
+from collections.abc import Mapping
+import numpy as np
+
+INDEXED_FIELDS = ("cost", "reliability", "latency")
+FIELDS = ("server_id", "reliability", "cost", "latency")
+
+
+class ServerRecord:
+    """Compact view of one server that still reads like the original server dict."""
+    __slots__ = FIELDS
+
+    def __init__(self, server_id, reliability, cost, latency):
+        self.server_id = server_id
+        self.reliability = reliability
+        self.cost = cost
+        self.latency = latency
+
+    def __getitem__(self, key):
+        if key not in FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in FIELDS else default
+
+    def keys(self):
+        return FIELDS
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in FIELDS}
+
+    def __repr__(self):
+        return f"ServerRecord({self.to_dict()})"
+
+
+class FleetRegistry(Mapping):
+    """Server configurations stored column-wise with sorted indexes for range queries.
+
+    Behaves like the old ``{server_id: server_dict}`` mapping, but each field lives in a
+    packed float array and server ids map to stable row indexes (rows are only appended).
+    Sorted indexes on cost, reliability and latency are built lazily and answer range
+    queries by bisection instead of scanning every server.
+    """
+
+    def __init__(self, servers=None):
+        self._ids = []
+        self._index = {}
+        self._columns = {field: array("d") for field in FIELDS[1:]}
+        self._sorted = {}
+        for server_id, server in (servers or {}).items():
+            self.add({"server_id": server_id, **server})
+
+    def add(self, server):
+        """Append a server (dict with server_id, reliability, cost, latency); returns its row index."""
+        server_id = server["server_id"]
+        if server_id in self._index:
+            raise ValueError(f"Server '{server_id}' is already registered.")
+        self._index[server_id] = len(self._ids)
+        self._ids.append(server_id)
+        for field, column in self._columns.items():
+            value = server.get(field)
+            column.append(np.nan if value is None else float(value))
+        self._sorted.clear()
+        return self._index[server_id]
+
+    def __getitem__(self, server_id):
+        i = self._index[server_id]
+        return ServerRecord(server_id, *(self._columns[field][i] for field in FIELDS[1:]))
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, server_id):
+        return server_id in self._index
+
+    def index_of(self, server_id):
+        """Stable row index of a server."""
+        return self._index[server_id]
+
+    def column(self, field):
+        """Copy of one field as a numpy array in row order."""
+        return self._view(field).copy()
+
+    def _view(self, field):
+        # Zero-copy view; must not outlive the call since appends resize the buffer
+        return np.frombuffer(self._columns[field], dtype=float) if len(self) else np.empty(0)
+
+    def _sorted_index(self, field):
+        # Missing (NaN) values never match a range, so they are left out of the index
+        if field not in self._sorted:
+            values = self._view(field)
+            order = np.argsort(values, kind="stable")
+            order = order[~np.isnan(values[order])]
+            self._sorted[field] = (values[order], order)
+        return self._sorted[field]
+
+    def query(self, inclusive=False, **ranges):
+        """Server ids whose fields lie inside the given (low, high) bounds.
+
+        Either bound may be None, e.g. ``query(cost=(None, 30), reliability=(0.9, None))``
+        returns servers with cost < 30 and reliability > 0.9, in registration order.
+        Bounds are strict unless ``inclusive`` is True; servers missing a queried field never match.
+        """
+        unknown = set(ranges) - set(INDEXED_FIELDS)
+        if unknown:
+            raise KeyError(f"Unsupported query fields: {sorted(unknown)}")
+        if not ranges:
+            return list(self._ids)
+
+        # Bisect every index, then scan only the narrowest slice
+        slices = {}
+        for field, (low, high) in ranges.items():
+            values, _ = self._sorted_index(field)
+            start = 0 if low is None else np.searchsorted(values, low, side="left" if inclusive else "right")
+            stop = len(values) if high is None else np.searchsorted(values, high, side="right" if inclusive else "left")
+            slices[field] = (start, max(start, stop))
+        narrowest = min(slices, key=lambda field: slices[field][1] - slices[field][0])
+        start, stop = slices[narrowest]
+        rows = self._sorted_index(narrowest)[1][start:stop]
+
+        for field, (low, high) in ranges.items():
+            if field == narrowest or not len(rows):
+                continue
+            values = self._view(field)[rows]
+            mask = ~np.isnan(values)
+            if low is not None:
+                mask &= values >= low if inclusive else values > low
+            if high is not None:
+                mask &= values <= high if inclusive else values < high
+            rows = rows[mask]
+        return [self._ids[i] for i in np.sort(rows)]
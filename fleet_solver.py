@@ -0,0 +1,280 @@
+import json
+import os
+import time
+import numpy as np
+
+try:
+    from scipy.optimize import Bounds, LinearConstraint, linprog, milp
+    from scipy.sparse import csr_matrix, hstack, identity, vstack
+except ImportError:  # scipy is optional; the greedy solver covers its absence
+    milp = None
+
+ACTIONS = ("hold", "buy", "sell")
+HOLD, BUY, SELL = range(3)
+# Above this many free servers the exact MILP gets slow; use the LP relaxation instead
+MILP_MAX_SERVERS = 1000
+
+
+class GlobalFleetSolver:
+    """Fleet-wide buy/sell/hold assignment under cost, capacity and sell-rate constraints.
+
+    Each server gets exactly one action. The objective maximizes the summed buy/sell
+    utilities (hold is 0) subject to:
+      - total cost of buys <= budget
+      - number of sells <= max_sells
+      - fleet capacity sum(capacity * (1 + buy - sell)) >= demand
+
+    The previous solution is kept so the next call can warm start: servers whose inputs
+    did not change keep their action and only the changed ones are re-solved against the
+    remaining budget, sell quota and capacity slack. An infeasible previous solution, or
+    one solved under a different budget, sell cap, demand or cooldown set, is never carried
+    over. A warm-started plan is only optimal for the re-solved servers, so it is reported
+    as feasible.
+    """
+
+    def __init__(self, budget=None, max_sells=None, method="milp", time_limit=30, tolerance=0.02):
+        self.budget = budget
+        self.max_sells = max_sells
+        self.method = method
+        self.time_limit = time_limit
+        self.tolerance = tolerance
+        self.previous = None
+        self.last_stats = {}
+
+    def solve(self, server_ids, buy_util, sell_util, cost, capacity, demand, warm_start=True, blocked_buys=()):
+        """Return {server_id: action} for the whole fleet; servers in blocked_buys are never bought."""
+        start = time.perf_counter()
+        server_ids = list(server_ids)
+        buy_util, sell_util, cost, capacity = (
+            np.asarray(values, dtype=float) for values in (buy_util, sell_util, cost, capacity)
+        )
+        inputs = np.column_stack([buy_util, sell_util, cost, capacity])
+        n = len(server_ids)
+        blocked_buys = set(blocked_buys)
+        can_buy = np.array([server_id not in blocked_buys for server_id in server_ids], dtype=bool)
+        limits = {
+            "budget": self.budget,
+            "max_sells": self.max_sells,
+            "demand": float(demand),
+            "blocked_buys": sorted(blocked_buys),
+        }
+
+        actions = np.full(n, HOLD, dtype=np.int8)
+        free = np.ones(n, dtype=bool)
+        warm_started = False
+        if (warm_start and self.previous is not None and self.previous.get("status") != "infeasible"
+                and self.previous.get("limits") == limits):
+            free, actions = self._carry_over(server_ids, inputs)
+            warm_started = True
+
+        status, method = self._solve_free(free, actions, buy_util, sell_util, cost, capacity, demand, can_buy)
+        if warm_started and status == "infeasible":
+            # The carried-over decisions leave no room for a feasible repair; solve from scratch
+            free[:] = True
+            actions[:] = HOLD
+            status, method = self._solve_free(free, actions, buy_util, sell_util, cost, capacity, demand, can_buy)
+            warm_started = False
+        if warm_started and status == "optimal":
+            status = "feasible"  # Carried-over decisions were not re-optimized
+
+        self.previous = {
+            "server_ids": server_ids,
+            "inputs": inputs,
+            "actions": actions.copy(),
+            "status": status,
+            "limits": limits,
+        }
+        self.last_stats = {
+            "method": method,
+            "status": status,
+            "warm_started": warm_started,
+            "resolved_servers": int(free.sum()),
+            "objective": round(float(buy_util[actions == BUY].sum() + sell_util[actions == SELL].sum()), 4),
+            "buy_cost": round(float(cost[actions == BUY].sum()), 2),
+            "sells": int((actions == SELL).sum()),
+            "capacity": round(float(capacity.sum() + capacity[actions == BUY].sum()
+                                    - capacity[actions == SELL].sum()), 2),
+            "demand": round(float(demand), 2),
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 3),
+        }
+        return {server_id: ACTIONS[action] for server_id, action in zip(server_ids, actions)}
+
+    def _carry_over(self, server_ids, inputs):
+        """Keep previous actions for servers whose inputs moved less than the tolerance."""
+        previous_ids = self.previous["server_ids"]
+        if server_ids == previous_ids:
+            positions = np.arange(len(server_ids))
+        else:
+            index = {server_id: i for i, server_id in enumerate(previous_ids)}
+            positions = np.array([index.get(server_id, -1) for server_id in server_ids], dtype=int)
+        known = positions >= 0
+        actions = np.full(len(server_ids), HOLD, dtype=np.int8)
+        actions[known] = self.previous["actions"][positions[known]]
+
+        free = ~known
+        previous = self.previous["inputs"][positions[known]]
+        # Absolute tolerance for utilities, relative for cost and capacity
+        changed = (np.abs(inputs[known] - previous) > self.tolerance * np.maximum(1, np.abs(previous))).any(axis=1)
+        free[np.flatnonzero(known)[changed]] = True
+        actions[free] = HOLD
+        return free, actions
+
+    def _solve_free(self, free, actions, buy_util, sell_util, cost, capacity, demand, can_buy):
+        """Assign actions to the free servers given the slack left by the fixed ones."""
+        fixed = ~free
+        budget = np.inf if self.budget is None else self.budget - cost[fixed & (actions == BUY)].sum()
+        sells = np.inf if self.max_sells is None else self.max_sells - int((fixed & (actions == SELL)).sum())
+        net_fixed = capacity[fixed & (actions == BUY)].sum() - capacity[fixed & (actions == SELL)].sum()
+        required = demand - capacity.sum() - net_fixed
+
+        idx = np.flatnonzero(free)
+        if budget < 0 or sells < 0:
+            return "infeasible", self.method
+        if not len(idx):
+            return ("optimal" if required <= 1e-9 else "infeasible"), self.method
+
+        args = (buy_util[idx], sell_util[idx], cost[idx], capacity[idx], can_buy[idx], budget, sells, required)
+        if self.method == "milp" and milp is not None:
+            solve = self._milp if len(idx) <= MILP_MAX_SERVERS else self._lp_round
+            result = solve(*args)
+            if result is not None:
+                solution, status = result
+                actions[idx] = solution
+                return status, "milp" if solve == self._milp else "lp"
+        solution, feasible = self._greedy(*args)
+        actions[idx] = solution
+        return ("feasible" if feasible else "infeasible"), "greedy"
+
+    @staticmethod
+    def _constraints(cost, capacity, budget, sells, required):
+        """Constraint rows A @ [buy, sell] <= upper for the free servers."""
+        n = len(cost)
+        rows = [hstack([identity(n), identity(n)])]
+        upper = [np.ones(n)]
+        if np.isfinite(budget):
+            rows.append(csr_matrix(np.concatenate([cost, np.zeros(n)])[None, :]))
+            upper.append([budget])
+        if np.isfinite(sells):
+            rows.append(csr_matrix(np.concatenate([np.zeros(n), np.ones(n)])[None, :]))
+            upper.append([sells])
+        if required > 0:
+            rows.append(csr_matrix(np.concatenate([-capacity, capacity])[None, :]))
+            upper.append([-required])
+        return vstack(rows, format="csr"), np.concatenate(upper)
+
+    def _milp(self, buy_util, sell_util, cost, capacity, can_buy, budget, sells, required):
+        """Exact solve with HiGHS over binary buy/sell variables; None if no solution was found."""
+        n = len(buy_util)
+        matrix, upper = self._constraints(cost, capacity, budget, sells, required)
+        result = milp(
+            c=-np.concatenate([buy_util, sell_util]),
+            constraints=LinearConstraint(matrix, -np.inf, upper),
+            integrality=np.ones(2 * n),
+            bounds=Bounds(0, np.concatenate([can_buy, np.ones(n)])),
+            options={"time_limit": self.time_limit, "mip_rel_gap": 1e-4},
+        )
+        if result.x is None:
+            return None
+        x = np.round(result.x).astype(bool)
+        solution = np.full(n, HOLD, dtype=np.int8)
+        solution[x[:n]] = BUY
+        solution[x[n:]] = SELL
+        return solution, "optimal" if result.status == 0 else "feasible"
+
+    def _lp_round(self, buy_util, sell_util, cost, capacity, can_buy, budget, sells, required):
+        """LP relaxation for large fleets: round fractional variables down, then repair capacity.
+
+        With only three coupling constraints a basic LP solution has at most a handful of
+        fractional variables, so the rounded solution is within a few servers of optimal.
+        Presolve is off: on 1e5 servers it ran for over a minute and ignored the time limit.
+        """
+        n = len(buy_util)
+        matrix, upper = self._constraints(cost, capacity, budget, sells, required)
+        bounds = np.column_stack([np.zeros(2 * n), np.concatenate([can_buy, np.ones(n)])])
+        result = linprog(-np.concatenate([buy_util, sell_util]), A_ub=matrix, b_ub=upper, bounds=bounds,
+                         method="highs-ipm", options={"time_limit": self.time_limit, "presolve": False})
+        if result.x is None:
+            return None
+        x = result.x > 1 - 1e-6
+        solution = np.full(n, HOLD, dtype=np.int8)
+        solution[x[:n]] = BUY
+        solution[x[n:] & ~x[:n]] = SELL
+        feasible = self._repair_capacity(solution, sell_util, cost, capacity, can_buy,
+                                         budget - cost[solution == BUY].sum(), required)
+        return solution, "feasible" if feasible else "infeasible"
+
+    @classmethod
+    def _greedy(cls, buy_util, sell_util, cost, capacity, can_buy, budget, sells, required):
+        """Fast heuristic: take the best sells and buys, then repair the capacity constraint."""
+        n = len(buy_util)
+        solution = np.full(n, HOLD, dtype=np.int8)
+
+        # Sells with the highest positive utility, up to the sell quota
+        sell_candidates = np.flatnonzero((sell_util > 0) & (sell_util >= buy_util))
+        sell_candidates = sell_candidates[np.argsort(-sell_util[sell_candidates], kind="stable")]
+        if np.isfinite(sells):
+            sell_candidates = sell_candidates[:int(sells)]
+        solution[sell_candidates] = SELL
+
+        # Buys by utility per unit cost while the budget lasts
+        buy_candidates = np.flatnonzero((buy_util > 0) & (solution == HOLD) & can_buy)
+        buy_candidates = buy_candidates[np.argsort(-buy_util[buy_candidates] / np.maximum(cost[buy_candidates], 1e-9),
+                                                   kind="stable")]
+        affordable = np.cumsum(cost[buy_candidates]) <= budget
+        solution[buy_candidates[affordable]] = BUY
+
+        feasible = cls._repair_capacity(solution, sell_util, cost, capacity, can_buy,
+                                        budget - cost[solution == BUY].sum(), required)
+        return solution, feasible
+
+    @staticmethod
+    def _repair_capacity(solution, sell_util, cost, capacity, can_buy, budget_left, required):
+        """Cancel the weakest sells, then buy the cheapest capacity, until the shortfall is covered."""
+        shortfall = required - capacity[solution == BUY].sum() + capacity[solution == SELL].sum()
+        if shortfall > 0:
+            sold = np.flatnonzero(solution == SELL)
+            sold = sold[np.argsort(sell_util[sold], kind="stable")]
+            restored = np.cumsum(capacity[sold])
+            cancel = np.searchsorted(restored, shortfall) + 1
+            solution[sold[:cancel]] = HOLD
+            shortfall -= restored[min(cancel, len(sold)) - 1] if len(sold) else 0
+        if shortfall > 0:
+            extra = np.flatnonzero((solution == HOLD) & (capacity > 0) & can_buy)
+            extra = extra[np.argsort(-capacity[extra] / np.maximum(cost[extra], 1e-9), kind="stable")]
+            extra = extra[np.cumsum(cost[extra]) <= budget_left]
+            gained = np.cumsum(capacity[extra])
+            take = np.searchsorted(gained, shortfall) + 1
+            solution[extra[:take]] = BUY
+            shortfall -= gained[min(take, len(extra)) - 1] if len(extra) else 0
+        return shortfall <= 1e-9
+
+    def save_state(self, path):
+        """Persist the last solution so the next run can warm start from it."""
+        if self.previous is None:
+            return
+        with open(path, "w") as f:
+            json.dump({
+                "server_ids": self.previous["server_ids"],
+                "inputs": self.previous["inputs"].tolist(),
+                "actions": self.previous["actions"].tolist(),
+                "status": self.previous["status"],
+                "limits": self.previous["limits"],
+            }, f)
+
+    def load_state(self, path):
+        """Restore a solution saved by save_state; missing or unreadable files start cold."""
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, "r") as f:
+                state = json.load(f)
+            self.previous = {
+                "server_ids": list(state["server_ids"]),
+                "inputs": np.asarray(state["inputs"], dtype=float).reshape(-1, 4),
+                "actions": np.asarray(state["actions"], dtype=np.int8),
+                "status": state.get("status"),
+                "limits": state.get("limits"),
+            }
+        except (json.JSONDecodeError, KeyError, ValueError):
+            print(f"⚠️ Warning: Solver state '{path}' is unreadable. Starting a cold solve.")
+            self.previous = None
@@ -0,0 +1,243 @@
+import json
+import time
+import numpy as np
+
+# Thresholds mirror the rules used in optimization.py and environment.py
+HIGH_LATENCY_MS = 400
+HIGH_PACKET_LOSS = 5
+HIGH_TEMPERATURE = 55
+LOW_COOLING_EFFICIENCY = 40
+UNSTABLE_POWER_STATES = ("unstable", "critical, failed")
+
+
+def step_key(key):
+    """Sort time step keys numerically when possible (shared by every module that orders log steps)."""
+    return (0, int(key)) if str(key).isdigit() else (1, str(key))
+
+
+def _server_key(server):
+    """Sort server ids like s1, s2, ..., s10 in natural order."""
+    digits = "".join(ch for ch in str(server) if ch.isdigit())
+    return (str(server).rstrip("0123456789"), int(digits) if digits else 0, str(server))
+
+
+def time_series(logs):
+    """Return the ordered list of per-step records from a generated log file."""
+    steps = logs.get("time_steps", {}) if isinstance(logs, dict) else {}
+    return [steps[key] for key in sorted(steps, key=step_key)]
+
+
+def _column(records, field, length, default=np.nan):
+    """Build a float array for one field, padded to the failure log length."""
+    values = np.full(length, default, dtype=float)
+    for i, record in enumerate(records[:length]):
+        value = record.get(field)
+        if isinstance(value, (int, float)):
+            values[i] = value
+    return values
+
+
+class LocalFailureAnalyzer:
+    """Rule-based failure analysis computed directly from the logs, no network calls."""
+
+    def __init__(self, failure_logs, network_logs=None, environment_logs=None):
+        self.failure_logs = failure_logs or {}
+        self.network_logs = network_logs or {}
+        self.environment_logs = environment_logs or {}
+
+    def _failure_matrix(self):
+        """Return (steps, servers, matrix) where matrix[t, s] is True if server s failed at step t."""
+        steps = sorted(self.failure_logs, key=step_key)
+        servers = sorted({s for step in steps for s in self.failure_logs[step]}, key=_server_key)
+        index = {server: i for i, server in enumerate(servers)}
+        matrix = np.zeros((len(steps), len(servers)), dtype=bool)
+        for t, step in enumerate(steps):
+            for server, failed in self.failure_logs[step].items():
+                matrix[t, index[server]] = bool(failed)
+        return steps, servers, matrix
+
+    def _condition_masks(self, length):
+        """Boolean masks over time steps for each adverse network/environment condition."""
+        network = time_series(self.network_logs)
+        environment = time_series(self.environment_logs)
+
+        latency = _column(network, "latency", length)
+        packet_loss = _column(network, "packet_loss", length)
+        temperature = _column(environment, "temperature", length)
+        cooling = _column(environment, "cooling_efficiency", length)
+        power = np.zeros(length, dtype=bool)
+        for i, record in enumerate(environment[:length]):
+            power[i] = record.get("power_stability") in UNSTABLE_POWER_STATES
+
+        metrics = {
+            "latency": latency,
+            "packet_loss": packet_loss,
+            "temperature": temperature,
+            "cooling_efficiency": cooling,
+        }
+        masks = {
+            "high_latency": latency > HIGH_LATENCY_MS,
+            "high_packet_loss": packet_loss > HIGH_PACKET_LOSS,
+            "high_temperature": temperature > HIGH_TEMPERATURE,
+            "low_cooling": cooling < LOW_COOLING_EFFICIENCY,
+            "unstable_power": power,
+        }
+        return metrics, masks
+
+    def analyze(self):
+        """Compute per-server failure frequency, condition co-occurrence and ranked recommendations."""
+        start = time.perf_counter()
+        steps, servers, matrix = self._failure_matrix()
+        num_steps = len(steps)
+
+        failure_counts = matrix.sum(axis=0)
+        failure_rates = matrix.mean(axis=0) if num_steps else np.zeros(len(servers))
+        fleet_failures = matrix.sum(axis=1).astype(float)
+        fleet_rate = float(matrix.mean()) if matrix.size else 0.0
+
+        last_failure = np.full(len(servers), -1)
+        if num_steps:
+            last_failure = np.where(matrix.any(axis=0), num_steps - 1 - np.argmax(matrix[::-1], axis=0), -1)
+        # Only failing servers get an entry; the rest are implied by server_count
+        server_stats = {
+            servers[i]: {
+                "failures": int(failure_counts[i]),
+                "failure_rate": round(float(failure_rates[i]), 3),
+                "last_failure_step": steps[last_failure[i]],
+            }
+            for i in np.flatnonzero(failure_counts)
+        }
+
+        metrics, masks = self._condition_masks(num_steps)
+        co_occurrence = {}
+        for name, mask in masks.items():
+            active = int(mask.sum())
+            rate_when = float(matrix[mask].mean()) if active and servers else 0.0
+            rate_otherwise = float(matrix[~mask].mean()) if active < num_steps and servers else 0.0
+            lift = None
+            if 0 < active < num_steps and servers:
+                # Floor the baseline at half an observation so a clean baseline still yields a finite lift
+                floor = 0.5 / ((num_steps - active) * len(servers))
+                lift = rate_when / max(rate_otherwise, floor)
+            per_server = matrix[mask].mean(axis=0) if active else np.zeros(len(servers))
+            co_occurrence[name] = {
+                "steps_active": active,
+                "failure_rate_when_active": round(rate_when, 3),
+                "failure_rate_otherwise": round(rate_otherwise, 3),
+                "lift": round(lift, 3) if lift is not None else None,
+                "most_affected": [servers[i] for i in np.argsort(-per_server)[:3] if per_server[i] > 0],
+            }
+
+        correlations = {}
+        telemetry = {}
+        for name, values in metrics.items():
+            valid = ~np.isnan(values)
+            telemetry[name] = self._summarize(values, valid, steps)
+            if valid.sum() > 1 and np.std(values[valid]) > 0 and np.std(fleet_failures[valid]) > 0:
+                correlations[name] = round(float(np.corrcoef(values[valid], fleet_failures[valid])[0, 1]), 3)
+            else:
+                correlations[name] = None
+
+        order = np.argsort(-failure_counts, kind="stable")
+        ranked_servers = [servers[i] for i in order if failure_counts[i] > 0]
+
+        insights = {
+            "backend": "local",
+            "time_steps": num_steps,
+            "fleet_failure_rate": round(fleet_rate, 3),
+            "server_count": len(servers),
+            "failed_servers": ranked_servers,
+            "servers": server_stats,
+            "co_occurrence": co_occurrence,
+            "correlations": correlations,
+            "telemetry": telemetry,
+            "recommendations": self._recommend(servers, failure_rates, fleet_rate, co_occurrence),
+        }
+        insights["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        return insights
+
+    @staticmethod
+    def _summarize(values, valid, steps):
+        """Summary statistics for one telemetry series, flagging steps more than 2 std from the mean."""
+        if not valid.any():
+            return {"mean": None, "min": None, "max": None, "std": None, "anomalous_steps": []}
+        observed = values[valid]
+        mean, std = float(observed.mean()), float(observed.std())
+        anomalous = np.flatnonzero(valid & (np.abs(values - mean) > 2 * std)) if std > 0 else []
+        return {
+            "mean": round(mean, 2),
+            "min": round(float(observed.min()), 2),
+            "max": round(float(observed.max()), 2),
+            "std": round(std, 2),
+            "anomalous_steps": [steps[i] for i in anomalous],
+        }
+
+    @staticmethod
+    def _recommend(servers, failure_rates, fleet_rate, co_occurrence):
+        """Rank recommendations by how far each finding exceeds the fleet baseline."""
+        recommendations = []
+        baseline = max(fleet_rate, 1e-9)
+
+        for i in np.flatnonzero(failure_rates > fleet_rate):
+            recommendations.append({
+                "target": servers[i],
+                "issue": f"failure rate {failure_rates[i]:.0%} vs fleet {fleet_rate:.0%}",
+                "action": "Replace or sell this server; exclude it from new purchases.",
+                "score": round(float(failure_rates[i] / baseline), 3),
+            })
+
+        condition_actions = {
+            "high_latency": "Delay purchases and reroute traffic during latency spikes.",
+            "high_packet_loss": "Investigate network links; favor selling unreliable servers.",
+            "high_temperature": "Inspect HVAC and rebalance load away from hot racks.",
+            "low_cooling": "Service cooling systems; improve airflow.",
+            "unstable_power": "Add UPS/redundant power feeds before scaling up.",
+        }
+        for name, stats in co_occurrence.items():
+            lift = stats["lift"]
+            if lift is not None and lift > 1:
+                recommendations.append({
+                    "target": name,
+                    "issue": f"failures {stats['failure_rate_when_active']:.0%} when active vs "
+                             f"{stats['failure_rate_otherwise']:.0%} otherwise",
+                    "action": condition_actions[name],
+                    "score": lift,
+                })
+
+        recommendations.sort(key=lambda r: -r["score"])
+        for priority, recommendation in enumerate(recommendations, start=1):
+            recommendation["priority"] = priority
+        return recommendations
+
+
+def format_insights(insights):
+    """Render structured insights as readable text for the console and history file."""
+    lines = [f"Local failure analysis over {insights['time_steps']} time steps "
+             f"(fleet failure rate {insights['fleet_failure_rate']:.0%}, {insights['elapsed_ms']} ms)."]
+
+    if insights["failed_servers"]:
+        lines.append("Most frequently failing servers:")
+        for server in insights["failed_servers"][:5]:
+            stats = insights["servers"][server]
+            lines.append(f"- {server}: {stats['failures']} failures ({stats['failure_rate']:.0%})")
+    else:
+        lines.append("No failures recorded.")
+
+    lines.append("Recommendations:")
+    for recommendation in insights["recommendations"] or [{"priority": 1, "target": "fleet",
+                                                            "issue": "no anomalies",
+                                                            "action": "No action needed."}]:
+        lines.append(f"{recommendation['priority']}. [{recommendation['target']}] "
+                     f"{recommendation['issue']} → {recommendation['action']}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    with open("data/dynamic_failure_logs.json", "r") as f:
+        failure_logs = json.load(f)
+    with open("data/dynamic_network_logs.json", "r") as f:
+        network_logs = json.load(f)
+    with open("data/dynamic_environment_logs.json", "r") as f:
+        environment_logs = json.load(f)
+
+    print(json.dumps(LocalFailureAnalyzer(failure_logs, network_logs, environment_logs).analyze(), indent=2))
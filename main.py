@@ -3,11 +3,18 @@ import os
 from datetime import datetime
 from environment import Environment
 from optimization import optimize_fleet
+from fleet_solver import GlobalFleetSolver
 from ai_failure_detection import AIFailureDetection
 
 # Constants
 OUTPUT_DIR = "output"
 HISTORY_FILE = os.path.join(OUTPUT_DIR, "historical_results.json")
+SOLVER_STATE_FILE = os.path.join(OUTPUT_DIR, "fleet_solver_state.json")
+
+# "rules" decides each server independently, "global" solves the whole fleet under the limits below
+OPTIMIZER_MODE = os.getenv("FLEET_OPTIMIZER_MODE", "rules")
+COST_BUDGET = float(os.environ["FLEET_COST_BUDGET"]) if os.getenv("FLEET_COST_BUDGET") else None
+MAX_SELLS = int(os.environ["FLEET_MAX_SELLS"]) if os.getenv("FLEET_MAX_SELLS") else None
 
 class FatigueTracker:
     def __init__(self, history_file):
@@ -62,10 +69,20 @@ def main():
         failure_path="data/dynamic_failure_logs.json"
     )
 
-    optimized_solution = optimize_fleet(env)
-
     fatigue_tracker = FatigueTracker(HISTORY_FILE)
-    adjusted_solution = fatigue_tracker.apply_cooldown(optimized_solution)
+
+    if OPTIMIZER_MODE == "global":
+        if not os.path.exists(OUTPUT_DIR):
+            os.makedirs(OUTPUT_DIR)
+        solver = GlobalFleetSolver(budget=COST_BUDGET, max_sells=MAX_SELLS)
+        solver.load_state(SOLVER_STATE_FILE)  # Warm start from the previous cycle
+        # Cooldown is a solver constraint here, so capacity still holds and the saved state is final
+        adjusted_solution = optimize_fleet(env, mode="global", solver=solver,
+                                           blocked_buys=fatigue_tracker.recent_failures)
+        solver.save_state(SOLVER_STATE_FILE)
+    else:
+        optimized_solution = optimize_fleet(env)
+        adjusted_solution = fatigue_tracker.apply_cooldown(optimized_solution)
 
     print("Optimized Server Actions:", adjusted_solution)
     if not adjusted_solution:
@@ -79,6 +96,7 @@ def main():
         "data/dynamic_network_logs.json",
         "data/dynamic_environment_logs.json"
     )
+    failure_insights = ai_detector.analyze_structured()
     ai_analysis = ai_detector.analyze_failures()
     print("\nAI Failure Analysis:\n", ai_analysis)
 
@@ -94,6 +112,8 @@ def main():
     save_results({
         "optimized_server_actions": adjusted_solution,
         "ai_failure_analysis": ai_analysis,
+        "failure_insights": failure_insights,
+        "prompt_stats": ai_detector.prompt_stats,
         "network_impact": network_impact,
         "environmental_impact": environmental_impact
     })
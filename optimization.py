@@ -1,21 +1,36 @@
 import random
+from fleet_solver import GlobalFleetSolver
+from local_failure_analysis import step_key
 
-def optimize_fleet(env):
+CAPACITY_PER_SERVER = 100  # Demand units a fully reliable server can serve (matches the default demand)
+SEVERE_CONDITION_WEIGHT = 0.10  # Extra sell utility when latency > 400ms and temperature > 55°C
+
+def get_fleet_demand(env):
+    """Total demand for the latest time step (or the flat per-server demand map)."""
+    demand = env.server_demand
+    if demand and all(isinstance(value, dict) for value in demand.values()):
+        latest = max(demand, key=step_key)
+        demand = demand[latest]
+    return sum(value for value in demand.values() if isinstance(value, (int, float)))
+
+def optimize_fleet(env, mode="rules", solver=None, blocked_buys=()):
     optimized_actions = {}
     cooldown_tracker = {}
     cooldown_duration = 3  # Prevent immediate rebuy after failure for 3 cycles
+    noise = mode != "global"  # The global solver needs repeatable inputs to warm start
 
     def get_sell_threshold(server, env):
         base = 0.05 + ((1 - server["reliability"]) * 0.30)
-        env_conditions = env.get_environment_factor(server["server_id"])
+        env_conditions = env.get_environment_factor(server["server_id"], noise=noise)
         power_factor = 0.10 if env_conditions["power_stability"] in ["unstable", "critical, failed"] else 0
         cooling_factor = 0.05 if env_conditions["cooling_efficiency"] < 40 else 0
         temp_factor = min((env_conditions["temperature"] - 40) / 250, 0.10)
-        return min(base + power_factor + cooling_factor + temp_factor, 0.90)
+        trend_factor = 0.05 if env.get_anomaly_scores(server["server_id"])["degrading"] else 0  # Sell sooner on sustained drift
+        return min(base + power_factor + cooling_factor + temp_factor - trend_factor, 0.90)
 
     def get_buy_threshold(server, env):
         base = 0.25 - (server["reliability"] * 0.20)
-        failure_penalty = 0.10 if env.get_failure_rate(server["server_id"]) > 0.20 else 0
+        failure_penalty = 0.10 if env.get_failure_rate(server["server_id"], noise=noise) > 0.20 else 0
         demand_factor = 0.10 if env.get_demand_factor(server["server_id"]) > 150 else -0.05
         return max(base - failure_penalty + demand_factor, 0.05)
 
@@ -32,6 +47,14 @@ def optimize_fleet(env):
 
         return 0.25 + latency_weight + temp_weight
 
+    if mode == "global":
+        return optimize_fleet_global(env, solver or GlobalFleetSolver(), get_sell_threshold, get_buy_threshold,
+                                     blocked_buys)
+
+    # Cost filters come from the registry's sorted cost index rather than per-server checks
+    sell_candidates = set(env.servers.query(cost=(15, None)))
+    buy_candidates = set(env.servers.query(cost=(None, 30)))
+
     for server_id, server in env.servers.items():
         failure_rate = env.get_failure_rate(server_id)
         network_latency = env.get_network_factor(server_id)["latency"]
@@ -47,10 +70,10 @@ def optimize_fleet(env):
         buy_threshold = get_buy_threshold(server, env)
         random_factor = get_random_factor(server_id, env)
 
-        if (failure_rate > sell_threshold and cost > 15) or (network_latency > 400 and temperature > 55):
+        if (failure_rate > sell_threshold and server_id in sell_candidates) or (network_latency > 400 and temperature > 55):
             action = "sell"
             cooldown_tracker[server_id] = cooldown_duration
-        elif (server["reliability"] > buy_threshold and cost < 30 and network_latency < 250 and temperature < 50) or random.random() < random_factor:
+        elif (server["reliability"] > buy_threshold and server_id in buy_candidates and network_latency < 250 and temperature < 50) or random.random() < random_factor:
             action = "buy"
         else:
             action = random.choices(["hold", "buy", "sell"], weights=[0.3, 0.4, 0.3])[0]
@@ -63,3 +86,35 @@ def optimize_fleet(env):
     print("\n🔍 Final Optimized Actions:", optimized_actions)
 
     return optimized_actions
+
+def optimize_fleet_global(env, solver, get_sell_threshold, get_buy_threshold, blocked_buys=()):
+    """Fleet-wide decisions from the threshold scores, subject to the solver's budget and capacity limits.
+
+    Utilities use the noise-free telemetry so unchanged servers keep their previous decision.
+    Servers in ``blocked_buys`` (cooldown after a recent sell) can only be held or sold.
+    """
+    buy_util, sell_util = [], []
+
+    for server_id, server in env.servers.items():
+        failure_rate = env.get_failure_rate(server_id, noise=False)
+        network_latency = env.get_network_factor(server_id)["latency"]
+        temperature = env.get_environment_factor(server_id, noise=False)["temperature"]
+        severe = network_latency > 400 and temperature > 55
+
+        sell_util.append(failure_rate - get_sell_threshold(server, env) + (SEVERE_CONDITION_WEIGHT if severe else 0))
+        buy_util.append(server["reliability"] - get_buy_threshold(server, env) - failure_rate
+                        - min(network_latency / 2000, 0.20) - min(max(temperature - 50, 0) / 50, 0.20))
+
+    # Cost and capacity come straight from the registry columns, in the same row order
+    optimized_actions = solver.solve(list(env.servers), buy_util, sell_util, env.servers.column("cost"),
+                                     env.servers.column("reliability") * CAPACITY_PER_SERVER, get_fleet_demand(env),
+                                     blocked_buys=blocked_buys)
+
+    print(f"Global solver: {solver.last_stats}")
+    if solver.last_stats["status"] == "infeasible":
+        print(f"⚠️ Warning: No plan meets the fleet limits (buy cost {solver.last_stats['buy_cost']} vs budget "
+              f"{solver.budget}, capacity {solver.last_stats['capacity']} vs demand {solver.last_stats['demand']}). "
+              f"Returning the closest plan found.")
+    print("\n🔍 Final Optimized Actions:", optimized_actions)
+
+    return optimized_actions
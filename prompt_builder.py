@@ -0,0 +1,154 @@
+import os
+
+# Default input budget for the failure analysis prompt, configurable per deployment
+DEFAULT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "1500"))
+CHARS_PER_TOKEN = 4
+
+PROMPT_HEADER = (
+    "You are an AI analyzing server failures. Below is a pre-aggregated summary of the failure logs, "
+    "network conditions, and environmental conditions. Stable servers were omitted and the remaining "
+    "findings are ordered by severity:\n\n"
+)
+PROMPT_FOOTER = (
+    "\nAnalyze the failures and provide actionable insights. Consider:\n"
+    "1. Which servers are failing most frequently?\n"
+    "2. Any patterns (time, network, environment)?\n"
+    "3. Recommendations to reduce failures.\n"
+    "4. Correlations across logs?\n"
+    "Structure your answer with clear observations and action points."
+)
+
+
+def estimate_tokens(text):
+    """Approximate token count (about 4 characters per token for English/JSON)."""
+    return max(1, -(-len(text) // CHARS_PER_TOKEN))
+
+
+def estimate_file_tokens(*paths):
+    """Approximate token count of JSON log files from their size on disk, without reading them."""
+    return sum(-(-os.path.getsize(path) // CHARS_PER_TOKEN) for path in paths if path and os.path.exists(path))
+
+
+def _step_summary(steps, edge=3):
+    """Count plus the first and last few steps, so a line stays short however many steps match."""
+    if not steps:
+        return "none"
+    if len(steps) <= 2 * edge:
+        return f"{len(steps)} ({', '.join(map(str, steps))})"
+    return f"{len(steps)} ({', '.join(map(str, steps[:edge]))} ... {', '.join(map(str, steps[-edge:]))})"
+
+
+def _server_items(insights):
+    """One finding per failing server, scored by failure rate over the fleet baseline and recency."""
+    baseline = max(insights["fleet_failure_rate"], 1e-9)
+    num_steps = max(insights["time_steps"], 1)
+    step_order = {server: i for i, server in enumerate(insights["failed_servers"])}
+    items = []
+    for server in insights["failed_servers"]:
+        stats = insights["servers"][server]
+        last = stats["last_failure_step"]
+        recency = 1.0 if last is None or not str(last).isdigit() else int(last) / num_steps
+        items.append((
+            stats["failure_rate"] / baseline + 0.5 * recency,
+            f"- {server}: {stats['failures']}/{insights['time_steps']} steps failed "
+            f"({stats['failure_rate']:.0%}), last failure at step {last}",
+            step_order[server],
+        ))
+    return items
+
+
+def _condition_items(insights):
+    """One finding per adverse condition that co-occurs with more failures than baseline."""
+    items = []
+    for name, stats in insights["co_occurrence"].items():
+        lift = stats["lift"]
+        if lift is None or lift <= 1:
+            continue
+        affected = ", ".join(stats["most_affected"]) or "none"
+        items.append((
+            lift,
+            f"- {name}: active in {stats['steps_active']}/{insights['time_steps']} steps, failure rate "
+            f"{stats['failure_rate_when_active']:.0%} vs {stats['failure_rate_otherwise']:.0%} otherwise "
+            f"(lift {lift}), most affected: {affected}",
+            0,
+        ))
+    return items
+
+
+def _telemetry_items(insights):
+    """One finding per telemetry series with anomalous steps or a notable failure correlation."""
+    items = []
+    for name, stats in insights.get("telemetry", {}).items():
+        correlation = insights["correlations"].get(name)
+        anomalies = stats["anomalous_steps"]
+        if not anomalies and (correlation is None or abs(correlation) < 0.3):
+            continue
+        items.append((
+            1 + len(anomalies) / max(insights["time_steps"], 1) + abs(correlation or 0),
+            f"- {name}: mean {stats['mean']}, range {stats['min']}-{stats['max']}, std {stats['std']}, "
+            f"anomalous steps {_step_summary(anomalies)}, correlation with fleet failures {correlation}",
+            0,
+        ))
+    return items
+
+
+def build_failure_prompt(insights, raw_tokens=None, token_budget=None):
+    """Builds a bounded-size failure analysis prompt from local analyzer insights.
+
+    Returns the prompt and a stats dict with the estimated token counts and, when
+    ``raw_tokens`` (the estimated size of the raw logs) is given, the compression ratio.
+    Raises ValueError if the budget cannot even fit the fixed instructions.
+    """
+    token_budget = token_budget or DEFAULT_TOKEN_BUDGET
+    stable_count = insights["server_count"] - len(insights["failed_servers"])
+
+    sections = [
+        ("Failing servers:", _server_items(insights)),
+        ("Conditions associated with failures:", _condition_items(insights)),
+        ("Telemetry anomalies:", _telemetry_items(insights)),
+    ]
+    overview = (
+        f"Fleet overview: {insights['server_count']} servers over {insights['time_steps']} time steps, "
+        f"fleet failure rate {insights['fleet_failure_rate']:.0%}, "
+        f"{stable_count} stable servers omitted.\n"
+    )
+
+    # Fill the budget with the highest-severity findings across all sections
+    ranked = sorted(
+        ((score, tie, index, line) for index, (_, items) in enumerate(sections) for score, line, tie in items),
+        key=lambda item: (-item[0], item[1], item[2]),
+    )
+    omitted_note = "\n({} lower-severity findings omitted to fit the token budget.)\n"
+    frame_tokens = estimate_tokens(PROMPT_HEADER + overview + PROMPT_FOOTER + omitted_note)
+    if frame_tokens > token_budget:
+        raise ValueError(f"Token budget {token_budget} is below the {frame_tokens} tokens the prompt frame needs.")
+    remaining = token_budget - frame_tokens
+    selected = [[] for _ in sections]
+    dropped = 0
+    for score, _, index, line in ranked:
+        cost = estimate_tokens(line + "\n") + (0 if selected[index] else estimate_tokens(f"\n{sections[index][0]}\n"))
+        if cost > remaining:
+            dropped += 1
+            continue
+        selected[index].append(line)
+        remaining -= cost
+
+    body = overview
+    for (title, _), lines in zip(sections, selected):
+        if lines:
+            body += f"\n{title}\n" + "\n".join(lines) + "\n"
+    if dropped:
+        body += omitted_note.format(dropped)
+
+    prompt = PROMPT_HEADER + body + PROMPT_FOOTER
+    prompt_tokens = estimate_tokens(prompt)
+    stats = {
+        "token_budget": token_budget,
+        "prompt_tokens": prompt_tokens,
+        "raw_tokens": raw_tokens,
+        "compression_ratio": round(raw_tokens / prompt_tokens, 2) if raw_tokens else None,
+        "findings_included": sum(len(lines) for lines in selected),
+        "findings_dropped": dropped,
+        "stable_servers_omitted": stable_count,
+    }
+    return prompt, stats